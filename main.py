@@ -1,34 +1,378 @@
-from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import JSONResponse
-import pdfplumber
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi.responses import JSONResponse, FileResponse
+from starlette.background import BackgroundTask
+import pymupdf
+from multiprocessing.dummy import Pool
+from functools import partial
+from contextlib import contextmanager
 import tempfile
+import io
+import asyncio
 import camelot
 import shutil
+import subprocess
 import os
 import base64
 import gc
+import re
+import stat
+import hashlib
+import orjson
+import diskcache
 
-def parse_pages_param(pages_str, total_pages):
-    if pages_str:
-        pages_clean = pages_str.strip().lower()
-        if pages_clean == "all":
-            return list(range(1, total_pages + 1))
-        elif "-" in pages_clean:
-            start, end = map(int, pages_clean.split("-"))
-            return list(range(start, min(end, total_pages) + 1))
-        elif pages_clean.isdigit():
-            end = int(pages_clean)
-            return list(range(1, min(end, total_pages) + 1))
-        else:
-            return [
-                int(p.strip())
-                for p in pages_clean.split(",")
-                if p.strip().isdigit() and 1 <= int(p.strip()) <= total_pages
-            ]
+from pages import parse_pages_param
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+class ORJSONResponse(JSONResponse):
+    # JSON-ответ, сериализуемый orjson (fastapi.responses.ORJSONResponse устарел в новых версиях FastAPI)
+    def render(self, content):
+        return orjson.dumps(content)
+
+# Ключевые слова строки заголовков выписки, собранные в одно регулярное выражение
+HEADER_KEYWORDS = ["КНП", "Дебет", "Кредит", "Назначение", "БИК", "Номер документа"]
+_HEADER_RE = re.compile("|".join(map(re.escape, HEADER_KEYWORDS)))
+
+# Результаты обработки кэшируются на диске по хэшу содержимого PDF.
+# CACHE_VERSION входит в ключ: его нужно поднимать при любом изменении формата результата
+CACHE_EXPIRE = 3600
+CACHE_VERSION = 3
+
+def _open_cache():
+    # В кэше лежат текст и Excel банковских выписок, поэтому каталог доступен только владельцу
+    cache_dir = os.environ.get("PDF_CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), f"pdfcache-{os.getuid()}"
+    )
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    st = os.lstat(cache_dir)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise RuntimeError(f"Cache directory {cache_dir} must be a directory owned by the current user.")
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        os.chmod(cache_dir, 0o700)
+    return diskcache.Cache(cache_dir)
+
+_cache = _open_cache()
+
+# Ограничение времени рендера одной страницы, чтобы «тяжёлый» PDF не занимал слот навсегда
+RENDER_TIMEOUT = 120
+
+# Максимальный размер загружаемого файла, больше — ответ 413.
+# Тело запроса дополнительно содержит multipart-разметку и поле pages, на них отводится
+# FORM_OVERHEAD: так проверка тела в LimitUploadSize никогда не строже счётчика в _hash_upload
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 50 << 20))
+FORM_OVERHEAD = 64 << 10
+
+class UploadTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=413, detail=f"File is larger than {MAX_UPLOAD_SIZE} bytes.")
+
+def too_large_response():
+    return ORJSONResponse(
+        {"status": "error", "message": f"File is larger than {MAX_UPLOAD_SIZE} bytes."},
+        status_code=413
+    )
+
+class LimitUploadSize:
+    """
+    ASGI-middleware, ограничивающий размер тела запроса.
+
+    Запрос с Content-Length больше лимита отклоняется сразу. Для запросов без
+    Content-Length (chunked) байты считаются по мере получения, и чтение тела
+    прерывается, как только лимит превышен. Ответы проходят без изменений.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size = MAX_UPLOAD_SIZE + FORM_OVERHEAD
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_body_size:
+            await too_large_response()(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    raise UploadTooLarge()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+def _hash_upload(src, dst=None):
+    # Хэш содержимого для кэша и проверка размера за один проход блоками по 1 МиБ;
+    # если передан dst, блоки заодно копируются в него
+    # Криптографический хэш: ключ кэша, общего для всех клиентов, не должен допускать подбор коллизий
+    hasher = hashlib.blake2b(digest_size=32)
+    copied = 0
+    while chunk := src.read(1 << 20):
+        copied += len(chunk)
+        if copied > MAX_UPLOAD_SIZE:
+            raise UploadTooLarge()
+        hasher.update(chunk)
+        if dst is not None:
+            dst.write(chunk)
+    return hasher.hexdigest()
+
+async def save_upload(file, suffix=".pdf"):
+    # Копируем загрузку на диск блоками по 1 МиБ в отдельном потоке, не читая файл целиком в память,
+    # и попутно считаем хэш содержимого для кэша
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            digest = await asyncio.get_running_loop().run_in_executor(
+                None, _hash_upload, file.file, tmp
+            )
+        except Exception:
+            os.unlink(tmp.name)
+            raise
+        return tmp.name, digest
+
+async def hash_upload(file):
+    # Загрузка не копируется: хэш считается отдельным проходом по файлу Starlette
+    digest = await asyncio.get_running_loop().run_in_executor(None, _hash_upload, file.file)
+    file.file.seek(0)
+    return digest
+
+@contextmanager
+def open_upload_pdf(upload):
+    # Starlette хранит загрузку в SpooledTemporaryFile (до 1 МиБ в памяти, дальше на диске).
+    # PDF открывается прямо из него: из буфера в памяти без копирования
+    # или через /proc/self/fd, если файл уже сброшен на диск
+    if getattr(upload, "_rolled", True):
+        with pymupdf.open(f"/proc/self/fd/{upload.fileno()}", filetype="pdf") as doc:
+            yield doc
     else:
-        return list(range(1, min(6, total_pages) + 1))
+        with upload._file.getbuffer() as view, pymupdf.open(stream=view, filetype="pdf") as doc:
+            yield doc
+
+class PdftocairoBackend:
+    # Рендер страницы для lattice через pdftocairo из poppler-utils (см. Aptfile).
+    # Каждый вызов — отдельный процесс, поэтому его можно запускать из нескольких потоков,
+    # в отличие от Ghostscript и встроенного pdfium (PDFium не потокобезопасен).
+    # Встроенный бэкенд camelot "poppler" не используется: в camelot 2.0.0 он передаёт
+    # команду одной строкой без shell и на Linux не запускается.
+    def _render(self, pdf_path, out, resolution, page):
+        return subprocess.run(
+            [
+                "pdftocairo", "-png", "-singlefile", "-r", str(resolution),
+                "-f", str(page), "-l", str(page), pdf_path, out
+            ],
+            check=True,
+            capture_output=True,
+            timeout=RENDER_TIMEOUT
+        ).stdout
+
+    def convert(self, pdf_path, png_path, resolution=300, page=1):
+        png_stem, _ = os.path.splitext(png_path)
+        self._render(pdf_path, png_stem, resolution, page)
+
+    def to_array(self, pdf_path, resolution=300, page=1):
+        # camelot 2.x рендерит через to_array; без него он пишет PNG во временный каталог,
+        # который удаляется только при выходе процесса. Здесь PNG идёт через stdout и
+        # декодируется в памяти, на диске не остаётся изображений выписки
+        import cv2
+        import numpy as np
+
+        png = self._render(pdf_path, "-", resolution, page)
+        return cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def read_page_tables(pdf_path, page_num):
+    # use_fallback=False: без pdftocairo запрос падает с ошибкой, а не уходит на небезопасный бэкенд
+    return camelot.read_pdf(
+        pdf_path,
+        flavor="lattice",
+        pages=str(page_num),
+        backend=PdftocairoBackend(),
+        use_fallback=False
+    )
+
+def _env_int(name, default):
+    # Пустое или некорректное значение переменной окружения означает значение по умолчанию
+    value = os.environ.get(name, "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else default
+
+# Ядра делятся между процессами gunicorn (WEB_CONCURRENCY, см. Procfile): каждый процесс
+# одновременно выполняет не больше WORKER_CPUS тяжёлых задач, чтобы в сумме их было не больше ядер
+WORKER_CPUS = max(1, (os.cpu_count() or 1) // _env_int("WEB_CONCURRENCY", 1))
+_cpu_semaphore = asyncio.Semaphore(WORKER_CPUS)
+
+# Потоки Camelot внутри одного запроса /convert-to-excel; по умолчанию — доля ядер процесса
+CAMELOT_THREADS = _env_int("CAMELOT_THREADS", min(WORKER_CPUS, 8))
+
+async def run_blocking(func, *args):
+    # Выносим блокирующую работу из event loop, чтобы сервер продолжал принимать запросы
+    async with _cpu_semaphore:
+        return await asyncio.to_thread(func, *args)
+
+def _do_extract(pdf_file, pages):
+    # Синхронная часть /extract, выполняется в отдельном потоке
+    # Текст собирается в одном буфере, без промежуточных строк на каждую страницу
+    buf = io.StringIO()
+    with open_upload_pdf(pdf_file) as doc:
+        total_pages = doc.page_count
+        page_numbers = sorted(parse_pages_param(pages, total_pages))
+        for n, i in enumerate(page_numbers):
+            if n:
+                buf.write("\n")
+            buf.write("\n=== Страница ")
+            buf.write(str(i))
+            buf.write(" ===\n")
+            buf.write(doc.load_page(i - 1).get_text("text"))
+    return total_pages, len(page_numbers), buf.tell(), buf.getvalue()
 
-app = FastAPI(title="PDF Extractor API", version="1.2")
+def page_lines(page, y_tolerance=3):
+    # Строки страницы в визуальном порядке, как у pdfplumber extract_text(): слова с близким
+    # верхним краем собираются в одну строку слева направо. Обычный get_text("text") идёт
+    # по порядку content stream и разбивает одну визуальную строку на несколько
+    words = sorted(page.get_text("words"), key=lambda w: (w[1], w[0]))
+    lines = []
+    row = []
+    top = None
+    for word in words:
+        if row and word[1] - top > y_tolerance:
+            lines.append(" ".join(w[4] for w in sorted(row, key=lambda w: w[0])))
+            row = []
+        if not row:
+            top = word[1]
+        row.append(word)
+    if row:
+        lines.append(" ".join(w[4] for w in sorted(row, key=lambda w: w[0])))
+    return lines
+
+def write_workbook(excel_path, metadata_lines, combined_df):
+    # Лист "Extracted": пустая строка, метаданные выписки, затем объединённая таблица.
+    # constant_memory не используется: pandas пишет ячейки по столбцам, а в этом режиме
+    # xlsxwriter молча отбрасывает запись в уже пройденные строки
+    import pandas as pd
+
+    with pd.ExcelWriter(
+        excel_path,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"strings_to_urls": False}}
+    ) as writer:
+        # Добавляем одну пустую строку перед метаданными
+        empty_meta = pd.DataFrame([[""]])
+        empty_meta.to_excel(writer, sheet_name="Extracted", index=False, header=False, startrow=0)
+
+        if metadata_lines:
+            meta_df = pd.DataFrame({0: metadata_lines})
+            # метаданные начинаются со второй строки (после пустой)
+            meta_df.to_excel(writer, sheet_name="Extracted", index=False, header=False, startrow=1)
+            start_row = len(metadata_lines) + 2  # метаданные + пустая строка
+        else:
+            start_row = 2  # если нет метаданных, таблица начнётся со 2 строки
+
+        combined_df.to_excel(
+            writer,
+            sheet_name="Extracted",
+            index=False,
+            header=False,
+            startrow=start_row
+        )
+
+def combine_tables(arrays):
+    # Склеивает таблицы Camelot (массивы numpy) в один массив для листа Excel.
+    # Первая строка пустая (отступ перед таблицей); у всех таблиц, кроме первой, строка
+    # заголовков пропускается; таблицы разной ширины дополняются пустыми ячейками справа
+    import numpy as np
+
+    rows = [arrays[0]]
+    for values in arrays[1:]:
+        # Ячейки склеиваются через перевод строки, чтобы совпадение не "перешагнуло" границу ячейки
+        first_row = "\n".join(map(str, values[0])) if len(values) else ""
+        rows.append(values[1:] if _HEADER_RE.search(first_row) else values)
+
+    width = max(values.shape[1] for values in rows)
+    combined = np.full((1 + sum(len(values) for values in rows), width), "", dtype=object)
+    row = 1
+    for values in rows:
+        combined[row:row + len(values), :values.shape[1]] = values
+        row += len(values)
+    return combined
+
+def _do_camelot_excel(pdf_path):
+    # Синхронная часть /convert-to-excel: возвращает путь к Excel (None, если таблиц нет) и число таблиц
+    import pandas as pd
+
+    # Один проход по документу: количество страниц и текст первой страницы для метаданных
+    with pymupdf.open(pdf_path) as doc:
+        total_pages = doc.page_count
+        first_page_lines = page_lines(doc.load_page(0)) if total_pages > 0 else []
+
+    # Таблицы копятся как массивы numpy и собираются в один DataFrame в самом конце
+    all_arrays = []
+    total_tables = 0
+
+    # Страницы обрабатываются параллельно в CAMELOT_THREADS потоках,
+    # imap отдаёт результаты в порядке страниц
+    with Pool(CAMELOT_THREADS) as pool:
+        page_tables = pool.imap(partial(read_page_tables, pdf_path), range(1, total_pages + 1))
+        for tables in page_tables:
+            if tables:
+                total_tables += len(tables)
+                all_arrays.extend(table.df.to_numpy() for table in tables)
+            # Очищаем память после обработки страницы
+            gc.collect()
+
+    if not all_arrays:
+        return None, total_tables
+
+    combined_df = pd.DataFrame(combine_tables(all_arrays))
+
+    # === Извлекаем метаданные (до первой строки с заголовками) ===
+    metadata_lines = []
+    for line in first_page_lines:
+        if _HEADER_RE.search(line):
+            break
+        metadata_lines.append(line)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_xlsx:
+        excel_path = tmp_xlsx.name
+
+    write_workbook(excel_path, metadata_lines, combined_df)
+
+    return excel_path, total_tables
+
+def _do_cached_extract(pdf_file, digest, pages):
+    # repr различает pages=None и строку "None"
+    key = f"v{CACHE_VERSION}:{digest}:extract:{pages!r}"
+    result = _cache.get(key)
+    if result is None:
+        result = _do_extract(pdf_file, pages)
+        _cache.set(key, result, expire=CACHE_EXPIRE)
+    return result
+
+def _do_cached_excel(pdf_path, digest):
+    # Excel хранится в кэше файлом, количество таблиц — в теге записи
+    key = f"v{CACHE_VERSION}:{digest}:excel"
+    cached, tag = _cache.get(key, read=True, tag=True)
+    if cached is not None:
+        with cached, tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_xlsx:
+            shutil.copyfileobj(cached, tmp_xlsx, 1 << 20)
+        return tmp_xlsx.name, int(tag)
+
+    excel_path, total_tables = _do_camelot_excel(pdf_path)
+    if excel_path is not None:
+        with open(excel_path, "rb") as f_excel:
+            _cache.set(key, f_excel, read=True, expire=CACHE_EXPIRE, tag=str(total_tables))
+    return excel_path, total_tables
+
+app = FastAPI(title="PDF Extractor API", version="1.2", default_response_class=ORJSONResponse)
+
+app.add_middleware(LimitUploadSize)
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request, exc):
+    return too_large_response()
 
 @app.post("/extract")
 async def extract_text(
@@ -36,7 +380,7 @@ async def extract_text(
     pages: str = Form(None)  # pages можно не передавать
 ):
     """
-    Извлекает текст из загруженного PDF-файла с помощью pdfplumber.
+    Извлекает текст из загруженного PDF-файла с помощью PyMuPDF.
 
     Параметры:
     - file: PDF-файл для обработки.
@@ -47,141 +391,106 @@ async def extract_text(
     Возвращает JSON с извлечённым текстом и информацией о файле.
     """
     try:
-        # Временное сохранение файла
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-
-        result_text = []
-        total_pages = 0
-
-        with pdfplumber.open(tmp_path) as pdf:
-            total_pages = len(pdf.pages)
-            page_numbers = parse_pages_param(pages, total_pages)
-            for i, page in enumerate(pdf.pages, start=1):
-                if i in page_numbers:
-                    text = page.extract_text() or ""
-                    result_text.append(f"\n=== Страница {i} ===\n{text}")
+        digest = await hash_upload(file)
 
-        os.unlink(tmp_path)
+        total_pages, pages_processed, text_length, text = await run_blocking(
+            _do_cached_extract, file.file, digest, pages
+        )
 
-        return JSONResponse({
+        return ORJSONResponse({
             "status": "ok",
             "file_name": file.filename,
             "total_pages": total_pages,
-            "pages_processed": len(result_text),
-            "text_length": sum(len(t) for t in result_text),
-            "text": "\n".join(result_text),
-            "engine_used": "pdfplumber"
+            "pages_processed": pages_processed,
+            "text_length": text_length,
+            "text": text,
+            "engine_used": "pymupdf"
         })
 
+    except UploadTooLarge:
+        return too_large_response()
+
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             {"status": "error", "message": str(e)},
             status_code=500
         )
 
+def excel_filename(pdf_name):
+    # Имя файла в multipart-запросе может отсутствовать
+    return (pdf_name or "document.pdf").replace(".pdf", ".xlsx")
+
+async def _convert_upload(file):
+    # Общая часть обоих Excel-эндпоинтов: возвращает путь к Excel (None, если таблиц нет) и число таблиц
+    pdf_path, digest = await save_upload(file)
+    try:
+        return await run_blocking(_do_cached_excel, pdf_path, digest)
+    finally:
+        os.unlink(pdf_path)
+
 @app.post("/convert-to-excel")
 async def convert_to_excel(file: UploadFile = File(...)):
     """
     Конвертирует PDF в Excel (.xlsx) с помощью Camelot.
-    Возвращает JSON с путем к Excel и количеством извлечённых таблиц.
+    Возвращает сам файл .xlsx, количество таблиц передаётся в заголовке X-Tables-Extracted.
     Обрабатывает PDF постранично, объединяя таблицы, чтобы оптимизировать память.
     """
-    import pandas as pd
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-            tmp_pdf.write(await file.read())
-            pdf_path = tmp_pdf.name
+        file_name = excel_filename(file.filename)
+        excel_path, total_tables = await _convert_upload(file)
 
-        # Получаем общее количество страниц
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
+        if excel_path is None:
+            return ORJSONResponse({"status": "error", "message": "No tables found."}, status_code=400)
 
-        all_dfs = []
-        total_tables = 0
+        # Файл отдаётся потоком без чтения целиком в память и удаляется после отправки
+        try:
+            return FileResponse(
+                excel_path,
+                media_type=XLSX_MEDIA_TYPE,
+                filename=file_name,
+                headers={"X-Tables-Extracted": str(total_tables)},
+                background=BackgroundTask(os.unlink, excel_path)
+            )
+        except Exception:
+            os.unlink(excel_path)
+            raise
 
-        # Обрабатываем по одной странице за раз
-        for page_num in range(1, total_pages + 1):
-            # Извлекаем таблицы с текущей страницы
-            tables = camelot.read_pdf(pdf_path, flavor="lattice", pages=str(page_num))
-            if tables:
-                total_tables += len(tables)
-                for idx, table in enumerate(tables):
-                    df = table.df
-                    if len(all_dfs) == 0:
-                        all_dfs.append(df)
-                    else:
-                        # Проверяем, является ли первая строка заголовком, если да, пропускаем её
-                        first_row = df.iloc[0].tolist()
-                        header_keywords = ["КНП", "Дебет", "Кредит", "Назначение", "БИК", "Номер документа"]
-                        if any(any(key in str(cell) for key in header_keywords) for cell in first_row):
-                            all_dfs.append(df.iloc[1:].reset_index(drop=True))
-                        else:
-                            all_dfs.append(df.reset_index(drop=True))
-            # Очищаем память после обработки страницы
-            gc.collect()
+    except UploadTooLarge:
+        return too_large_response()
 
-        if not all_dfs:
-            os.unlink(pdf_path)
-            return JSONResponse({"status": "error", "message": "No tables found."}, status_code=400)
-
-        combined_df = pd.concat(all_dfs, ignore_index=True)
-
-        # === Извлекаем метаданные (до первой строки с заголовками) ===
-        metadata_lines = []
-        with pdfplumber.open(pdf_path) as pdf:
-            if total_pages > 0:
-                lines = (pdf.pages[0].extract_text() or "").splitlines()
-                header_keywords = ["КНП", "Дебет", "Кредит", "Назначение", "БИК", "Номер документа"]
-                for line in lines:
-                    if any(key in line for key in header_keywords):
-                        break
-                    metadata_lines.append(line)
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_xlsx:
-            excel_path = tmp_xlsx.name
-
-        with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
-            # Добавляем одну пустую строку перед метаданными
-            empty_meta = pd.DataFrame([[""]])
-            empty_meta.to_excel(writer, sheet_name="Extracted", index=False, header=False, startrow=0)
-
-            if metadata_lines:
-                meta_df = pd.DataFrame({0: metadata_lines})
-                # метаданные начинаются со второй строки (после пустой)
-                meta_df.to_excel(writer, sheet_name="Extracted", index=False, header=False, startrow=1)
-                start_row = len(metadata_lines) + 2  # метаданные + пустая строка
-            else:
-                start_row = 2  # если нет метаданных, таблица начнётся со 2 строки
-
-            # Добавляем пустую строку перед таблицей с 0 в первой ячейке
-            empty_row = pd.DataFrame([[""] * combined_df.shape[1]], columns=combined_df.columns)
-            combined_df_with_empty = pd.concat([empty_row, combined_df], ignore_index=True)
-
-            combined_df_with_empty.to_excel(
-                writer,
-                sheet_name="Extracted",
-                index=False,
-                header=False,
-                startrow=start_row
-            )
+    except Exception as e:
+        return ORJSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
-        # Кодируем Excel файл в base64
-        with open(excel_path, "rb") as f_excel:
-            excel_bytes = f_excel.read()
-            excel_base64 = base64.b64encode(excel_bytes).decode("utf-8")
+@app.post("/convert-to-excel-base64")
+async def convert_to_excel_base64(file: UploadFile = File(...)):
+    """
+    То же, что /convert-to-excel, но возвращает JSON с Excel в base64
+    и количеством извлечённых таблиц (для интеграций вроде n8n).
+    """
+    try:
+        file_name = excel_filename(file.filename)
+        excel_path, total_tables = await _convert_upload(file)
 
-        # Удаляем временные файлы
-        os.unlink(pdf_path)
-        os.unlink(excel_path)
+        if excel_path is None:
+            return ORJSONResponse({"status": "error", "message": "No tables found."}, status_code=400)
 
-        return JSONResponse({
+        # Кодируем Excel файл в base64
+        try:
+            with open(excel_path, "rb") as f_excel:
+                excel_bytes = f_excel.read()
+                excel_base64 = base64.b64encode(excel_bytes).decode("utf-8")
+        finally:
+            os.unlink(excel_path)
+
+        return ORJSONResponse({
             "status": "ok",
-            "file_name": file.filename.replace(".pdf", ".xlsx"),
+            "file_name": file_name,
             "tables_extracted": total_tables,
             "excel_base64": excel_base64
         })
 
+    except UploadTooLarge:
+        return too_large_response()
+
     except Exception as e:
-        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
\ No newline at end of file
+        return ORJSONResponse({"status": "error", "message": str(e)}, status_code=500)
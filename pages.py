@@ -0,0 +1,33 @@
+import re
+from functools import lru_cache
+
+_PAGES_RE = re.compile(r"^(?:all|(\d+)\s*-\s*(\d+)|(\d+)|(\d+(?:\s*,\s*\d+)+))$")
+
+@lru_cache(maxsize=512)
+def parse_pages_param(pages_str, total_pages):
+    """
+    Разбирает параметр pages в множество номеров страниц (с 1).
+
+    Поддерживает "all", диапазон ("1-5"), первые N страниц ("3")
+    и список ("1,3,7"). Без параметра возвращает первые 6 страниц.
+    Любой другой формат (например, "1-5,7") вызывает ValueError.
+    Результат кэшируется по (pages_str, total_pages), поэтому он неизменяемый.
+    """
+    if not pages_str:
+        return frozenset(range(1, min(6, total_pages) + 1))
+
+    pages_clean = pages_str.strip().lower()
+    match = _PAGES_RE.match(pages_clean)
+    if match is None:
+        raise ValueError(f"Invalid pages parameter: {pages_str!r}")
+
+    start, end, count, page_list = match.groups()
+    if start is not None:
+        return frozenset(range(max(int(start), 1), min(int(end), total_pages) + 1))
+    if count is not None:
+        return frozenset(range(1, min(int(count), total_pages) + 1))
+    if page_list is not None:
+        return frozenset(
+            page for page in map(int, page_list.split(",")) if 1 <= page <= total_pages
+        )
+    return frozenset(range(1, total_pages + 1))
@@ -0,0 +1,90 @@
+import pymupdf
+import numpy as np
+import openpyxl
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from main import combine_tables, page_lines, write_workbook
+
+
+def read_rows(excel_path):
+    sheet = openpyxl.load_workbook(excel_path)["Extracted"]
+    return [["" if cell is None else cell for cell in row] for row in sheet.iter_rows(values_only=True)]
+
+
+def test_write_workbook_keeps_every_cell(tmp_path):
+    excel_path = tmp_path / "out.xlsx"
+    table = [["", "", ""], ["a1", "b1", "c1"], ["a2", "b2", "c2"], ["a3", "b3", "c3"]]
+
+    write_workbook(excel_path, ["Выписка", "Счёт 123"], pd.DataFrame(table))
+
+    rows = read_rows(excel_path)
+    assert [row[0] for row in rows[:3]] == ["", "Выписка", "Счёт 123"]
+    assert rows[4:] == table
+
+
+def test_write_workbook_without_metadata(tmp_path):
+    excel_path = tmp_path / "out.xlsx"
+    table = [["", ""], ["x", "y"]]
+
+    write_workbook(excel_path, [], pd.DataFrame(table))
+
+    assert read_rows(excel_path)[3:] == [["x", "y"]]
+
+
+def test_upload_over_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_SIZE", 100 << 10)
+    client = TestClient(main.app)
+
+    response = client.post("/extract", files={"file": ("big.pdf", b"0" * (120 << 10), "application/pdf")})
+
+    assert response.status_code == 413
+    assert response.json()["status"] == "error"
+
+
+def test_chunked_upload_over_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_SIZE", 100 << 10)
+    client = TestClient(main.app)
+
+    def body():
+        yield b'--B\r\nContent-Disposition: form-data; name="file"; filename="big.pdf"\r\n\r\n'
+        for _ in range(20):
+            yield b"0" * (16 << 10)
+        yield b"\r\n--B--\r\n"
+
+    response = client.post(
+        "/extract", content=body(), headers={"content-type": "multipart/form-data; boundary=B"}
+    )
+
+    assert response.status_code == 413
+
+
+def test_page_lines_follow_visual_rows():
+    doc = pymupdf.open()
+    page = doc.new_page()
+    # Порядок в content stream специально отличается от визуального
+    page.insert_text((50, 120), "Period: 01.01.2024 - 31.01.2024")
+    page.insert_text((50, 60), "Bank")
+    page.insert_text((300, 60), "Statement")
+    page.insert_text((50, 80), "Client:")
+    page.insert_text((150, 80), "Romashka LLP")
+
+    assert page_lines(page) == ["Bank Statement", "Client: Romashka LLP", "Period: 01.01.2024 - 31.01.2024"]
+
+
+def test_combine_tables_pads_widths_and_skips_repeated_header():
+    first = np.array([["Номер документа", "Дебет"], ["1", "100"]], dtype=object)
+    # Продолжение таблицы на следующей странице: заголовок повторяется и пропускается
+    continued = np.array([["Номер документа", "Дебет", "КНП"], ["2", "200", "119"]], dtype=object)
+    no_header = np.array([["3"]], dtype=object)
+
+    combined = combine_tables([first, continued, no_header])
+
+    assert combined.tolist() == [
+        ["", "", ""],
+        ["Номер документа", "Дебет", ""],
+        ["1", "100", ""],
+        ["2", "200", "119"],
+        ["3", "", ""],
+    ]
@@ -0,0 +1,26 @@
+import pytest
+
+from pages import parse_pages_param
+
+
+@pytest.mark.parametrize(
+    "pages_str, expected",
+    [
+        (None, {1, 2, 3, 4, 5, 6}),
+        ("all", set(range(1, 11))),
+        (" ALL ", set(range(1, 11))),
+        ("3", {1, 2, 3}),
+        ("0-3", {1, 2, 3}),
+        ("8 - 20", {8, 9, 10}),
+        ("1, 3,7", {1, 3, 7}),
+        ("2,42", {2}),
+    ],
+)
+def test_parse_pages_param(pages_str, expected):
+    assert parse_pages_param(pages_str, 10) == expected
+
+
+@pytest.mark.parametrize("pages_str", ["1-5,7", "1,x,3", "1,3,", "first", "5-"])
+def test_parse_pages_param_rejects_unknown_format(pages_str):
+    with pytest.raises(ValueError):
+        parse_pages_param(pages_str, 10)